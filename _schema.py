@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Shared parameter metadata for the `add` tool (plus the /api/add response model).
+
+The Field(...) objects are built once at import and reused as the defaults of
+add() in both my_mcp_server.py and my_mcp_server_dualmode.py; the descriptions
+are also used for the Query(...) parameters of the HTTP /api/add endpoint
+(fastapi is only imported in --mode http, so Query objects are built there).
+
+Validation cost: FastMCP and FastAPI both derive the (a: int, b: int) schema
+and build its pydantic-core validator once, at registration, and reuse it
+for every call; there is no per-call schema walk to cache away with a
+separate TypeAdapter.
+"""
+
+from pydantic import BaseModel, Field
+
+A_DESCRIPTION = "The first number to add"
+B_DESCRIPTION = "The second number to add"
+
+A_FIELD = Field(description=A_DESCRIPTION)
+B_FIELD = Field(description=B_DESCRIPTION)
+
+
+class AddHttpResult(BaseModel):
+    """Response body of the HTTP /api/add endpoint."""
+    result: int
+    call_id: str
+    duration_s: float
@@ -8,61 +8,169 @@ MCP server with robust logging, debugging, and error handling.
 What’s new:
 - Structured logging with env-configurable level (MCP_LOG_LEVEL).
 - Log level is controlled by MCP_LOG_LEVEL (e.g., DEBUG, INFO, WARNING).
-- Defensive validation (bounds + type checks are explained in logs).
+- Defensive validation (bounds checks are explained in logs).
 - Try/except around tool logic with helpful error messages for clients.
 - Execution timing + per-call correlation IDs for easier tracing.
 - Graceful shutdown on SIGINT/SIGTERM with final log flush.
 """
 
+import atexit
+import functools
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import signal
 import sys
 import time
 import traceback
 import uuid
-from typing import Tuple
+from itertools import count
+from typing import Optional
 
+import orjson
+import structlog
 from fastmcp import FastMCP
-from pydantic import Field, ValidationError
+
+from _schema import A_FIELD, B_FIELD
 
 # -----------------------------------------------------------------------------
 # Logging setup
 # -----------------------------------------------------------------------------
 LOG_LEVEL = os.getenv("MCP_LOG_LEVEL", "DEBUG").upper()
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL, logging.INFO),
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    stream=sys.stdout, 
-    # """  stream=sys.stderr,  # send logs to stderr so they don’t interfere with MCP I/O """
+LOG_LEVEL_NO = getattr(logging, LOG_LEVEL, logging.INFO)
+
+_SHARED_PROCESSORS = [
+    structlog.stdlib.add_logger_name,
+    structlog.stdlib.add_log_level,
+    structlog.processors.TimeStamper(fmt="iso", utc=True),
+]
+
+
+def _orjson_dumps(obj, **kw) -> str:
+    # orjson can't encode integers wider than 64 bits (e.g. an out-of-range
+    # a/b in add_invoked); those records fall back to the stdlib encoder.
+    try:
+        return orjson.dumps(obj, **kw).decode()
+    except TypeError:
+        return json.dumps(obj, separators=(",", ":"), **kw)
+
+
+# One pipeline for everything. This server's structlog events and stdlib
+# records (fastmcp, mcp, …) are rendered to a JSON line by orjson in the
+# QueueHandler, and a background listener thread does the only (blocking)
+# write to stdout, so tool calls just pay the render + enqueue cost.
+_log_queue = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(structlog.stdlib.ProcessorFormatter(
+    foreign_pre_chain=_SHARED_PROCESSORS,
+    processors=[
+        structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+        structlog.processors.format_exc_info,
+        structlog.processors.JSONRenderer(serializer=_orjson_dumps),
+    ],
+))
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(logging.Formatter("%(message)s"))
+_root = logging.getLogger()
+_root.addHandler(_queue_handler)
+_root.setLevel(LOG_LEVEL_NO)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, _stream_handler, respect_handler_level=True
 )
-logger = logging.getLogger("calculator_mcp")
+_log_listener.start()
+_listener_stopped = False
+
+
+def _stop_logging() -> None:
+    """Drain queued records and flush stdout; safe to call more than once."""
+    global _listener_stopped
+    if not _listener_stopped:
+        _listener_stopped = True
+        _log_listener.stop()
+    _stream_handler.flush()
+
+
+atexit.register(_stop_logging)
+
+# structlog front end for this server's own events: calls below the
+# configured level are no-ops (filtering bound logger); the rest are passed
+# as event dicts to the stdlib "calculator_mcp" logger and the queue above.
+structlog.configure(
+    processors=_SHARED_PROCESSORS + [
+        structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+    ],
+    wrapper_class=structlog.make_filtering_bound_logger(LOG_LEVEL_NO),
+    logger_factory=structlog.stdlib.LoggerFactory(),
+    cache_logger_on_first_use=True,
+)
+logger = structlog.get_logger("calculator_mcp")
 
 # -----------------------------------------------------------------------------
 # Utility: input validation and timing helpers
 # -----------------------------------------------------------------------------
+_LIMIT = 10**18
+
+
 def _validate_add_args(a: int, b: int) -> None:
     """
     Extra guardrails beyond Pydantic type coercion:
     - Ensure arguments are in a "reasonable" range to avoid pathological inputs.
-    - Adjust limits as needed for your use-case.
+    - Adjust limits (_LIMIT) as needed for your use-case.
+    Types are already enforced by the tool schema, so only bounds are checked
+    (chained comparisons, no abs() allocation for large ints).
     """
-    LIMIT = 10**18
-    if not isinstance(a, int) or not isinstance(b, int):
-        # Shouldn’t happen if the client respects schema, but log defensively.
-        raise TypeError("Both 'a' and 'b' must be integers.")
-    if abs(a) > LIMIT or abs(b) > LIMIT:
-        raise ValueError(f"Input out of bounds. |a|, |b| must be ≤ {LIMIT}.")
+    if -_LIMIT <= a <= _LIMIT and -_LIMIT <= b <= _LIMIT:
+        return
+    raise ValueError(f"Input out of bounds. |a|, |b| must be ≤ {_LIMIT}.")
 
 
-def _time_call() -> Tuple[float, callable]:
-    """Simple wall-clock timer for execution duration."""
-    start = time.perf_counter()
+# Log level is fixed at startup (MCP_LOG_LEVEL), so resolve it once instead
+# of on every call. Timing is skipped entirely when INFO is off.
+_DEBUG_ON = LOG_LEVEL_NO <= logging.DEBUG
+_INFO_ON = LOG_LEVEL_NO <= logging.INFO
 
-    def done() -> float:
-        return time.perf_counter() - start
 
-    return start, done
+def _elapsed(t0: Optional[float]) -> Optional[float]:
+    """Seconds since t0, or None when the call was not timed."""
+    return None if t0 is None else time.perf_counter() - t0
+
+
+def _log_exception(event: str, e: BaseException, **kw) -> None:
+    """Log an unexpected error; the full traceback is only formatted under DEBUG."""
+    if _DEBUG_ON:
+        kw["traceback"] = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+    else:
+        kw["error"] = repr(e)
+    logger.error(event, **kw)
+
+
+def _log_unexpected_errors(event: str, message: str):
+    """
+    Decorator for tool functions: anything other than a ValueError is logged
+    as `event` and re-raised as a RuntimeError carrying only `message`, so
+    internals don't leak to the client.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except ValueError:
+                raise
+            except Exception as e:
+                _log_exception(event, e)
+                raise RuntimeError(message) from e
+        return wrapper
+    return decorator
+
+
+# Correlation IDs: a random per-process prefix (drawn once at import) plus a
+# cheap monotonic counter rendered as hex. Unique across processes and
+# restarts without a CSPRNG read + UUID formatting on every call.
+_CID_PREFIX = uuid.uuid4().hex[:8]
+_CID = count()
 
 
 # -----------------------------------------------------------------------------
@@ -75,9 +183,10 @@ mcp = FastMCP(name="Calculator_Server")
     title="Add two numbers",
     description="Adds two integer numbers together and returns the result."
 )
+@_log_unexpected_errors("add_error", "An unexpected error occurred while adding the numbers.")
 def add(
-    a: int = Field(description="The first number to add"),
-    b: int = Field(description="The second number to add"),
+    a: int = A_FIELD,
+    b: int = B_FIELD,
 ) -> int:
     """
     Adds two integers with:
@@ -85,43 +194,26 @@ def add(
     - Error handling that returns clean messages to the client
     - Debug logs including a correlation ID and timing
     """
-    call_id = str(uuid.uuid4())
-    logger.debug(f"[{call_id}] add() invoked with a={a}, b={b}")
-    _, done = _time_call()
+    call_id = f"{_CID_PREFIX}-{next(_CID):x}"
+    if _DEBUG_ON:
+        logger.debug("add_invoked", call_id=call_id, a=a, b=b)
+    t0 = time.perf_counter() if _INFO_ON else None
 
     try:
         # Defensive validation (pydantic handles types, we add bounds, etc.)
         _validate_add_args(a, b)
-
-        result = a + b
-        duration = done()
-        logger.info(f"[{call_id}] add() success result={result} in {duration:.6f}s")
-        return result
-
-    except (TypeError, ValueError) as e:
+    except ValueError as e:
         # User/validation error: log as WARNING and surface a clear message.
-        duration = done()
-        logger.warning(
-            f"[{call_id}] add() validation error after {duration:.6f}s: {e}"
-        )
+        # (Unexpected errors are handled by @_log_unexpected_errors.)
+        logger.warning("add_invalid", call_id=call_id, duration_s=_elapsed(t0), error=str(e))
         # Raising ValueError keeps the error structured for the MCP client.
         raise ValueError(f"Invalid input: {e}") from e
 
-    except ValidationError as e:
-        # Pydantic-specific validation details (should be rare here).
-        duration = done()
-        logger.warning(
-            f"[{call_id}] add() pydantic validation error after {duration:.6f}s: {e}"
-        )
-        raise ValueError(f"Validation failed: {e}") from e
-
-    except Exception as e:
-        # Unexpected error: log full traceback for debugging, return generic msg.
-        duration = done()
-        tb = "".join(traceback.format_exception(type(e), e, e.__traceback__))
-        logger.error(f"[{call_id}] add() unexpected error after {duration:.6f}s:\n{tb}")
-        # Avoid leaking sensitive internals to clients
-        raise RuntimeError("An unexpected error occurred while adding the numbers.") from e
+    result = a + b
+    if _INFO_ON:
+        logger.info("add_ok", call_id=call_id, result=result,
+                    duration_s=time.perf_counter() - t0)
+    return result
 
 
 # -----------------------------------------------------------------------------
@@ -130,14 +222,13 @@ def add(
 def _install_signal_handlers():
     def _handler(signum, _frame):
         name = signal.Signals(signum).name
-        logger.info(f"Received {name}. Shutting down Calculator_Server gracefully…")
+        logger.info("shutdown", signal=name, service="Calculator_Server")
         # If FastMCP has its own shutdown lifecycle, call it here.
-        # We exit after flushing log handlers.
-        for h in logger.handlers:
-            try:
-                h.flush()
-            except Exception:
-                pass
+        # We exit after draining the log queue and flushing the stream handler.
+        try:
+            _stop_logging()
+        except Exception:
+            pass
         sys.exit(0)
 
     try:
@@ -145,15 +236,15 @@ def _install_signal_handlers():
         signal.signal(signal.SIGTERM, _handler)
     except Exception as e:
         # Not all environments allow installing signal handlers (e.g., Windows, restricted runtimes).
-        logger.debug(f"Signal handlers not installed: {e}")
+        logger.debug("signal_handlers_not_installed", error=str(e))
 
 
 # -----------------------------------------------------------------------------
 # Entrypoint
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
-    logger.info("Starting Calculator_Server (transport=stdio)…")
-    logger.debug(f"Effective LOG_LEVEL={logging.getLevelName(logger.level)}")
+    logger.info("startup", service="Calculator_Server", transport="stdio")
+    logger.debug("log_level", level=logging.getLevelName(LOG_LEVEL_NO))
     _install_signal_handlers()
 
     # The 'stdio' transport mode allows the server to communicate via stdin/stdout.
@@ -162,5 +253,5 @@ if __name__ == "__main__":
         mcp.run(transport="stdio")
     except Exception as e:
         tb = "".join(traceback.format_exception(type(e), e, e.__traceback__))
-        logger.critical(f"Fatal server error:\n{tb}")
+        logger.critical("fatal_server_error", traceback=tb)
         sys.exit(1)
@@ -3,6 +3,10 @@
 MCP server that can run in two modes:
   1) MCP over stdio  →  `python my_mcp_server.py --mode stdio`
   2) HTTP (FastAPI)  →  `python my_mcp_server.py --mode http --host 0.0.0.0 --port 8000`
+     add `--workers N` to run N uvicorn worker processes. Each worker
+     re-imports this module, so per-process state (log queue/listener,
+     correlation-ID counter) is per worker; call IDs carry a random
+     per-process prefix so they stay unique across workers.
 
 Env:
   MCP_LOG_LEVEL = DEBUG|INFO|WARNING|ERROR (default DEBUG)
@@ -10,50 +14,158 @@ Env:
 Requires:
   fastmcp
   pydantic>=2
+  structlog
+  orjson
   # only for --mode http:
   fastapi
-  uvicorn[standard]
+  uvicorn[standard]   (pulls in uvloop + httptools)
 """
 
 import argparse
+import atexit
+import functools
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import signal
 import sys
 import time
 import traceback
 import uuid
-from typing import Tuple
+from itertools import count
+from typing import Optional
 
-from pydantic import Field, ValidationError
+import orjson
+import structlog
 from fastmcp import FastMCP
 
+from _schema import A_DESCRIPTION, A_FIELD, AddHttpResult, B_DESCRIPTION, B_FIELD
+
 # -----------------------------
 # Logging
 # -----------------------------
 LOG_LEVEL = os.getenv("MCP_LOG_LEVEL", "DEBUG").upper()
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL, logging.INFO),
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    stream=sys.stdout,
+LOG_LEVEL_NO = getattr(logging, LOG_LEVEL, logging.INFO)
+
+_SHARED_PROCESSORS = [
+    structlog.stdlib.add_logger_name,
+    structlog.stdlib.add_log_level,
+    structlog.processors.TimeStamper(fmt="iso", utc=True),
+]
+
+def _orjson_dumps(obj, **kw) -> str:
+    # orjson can't encode integers wider than 64 bits (e.g. an out-of-range
+    # a/b in add_invoked); those records fall back to the stdlib encoder.
+    try:
+        return orjson.dumps(obj, **kw).decode()
+    except TypeError:
+        return json.dumps(obj, separators=(",", ":"), **kw)
+
+# One pipeline for everything: our structlog events and stdlib records
+# (fastmcp, uvicorn, …) are rendered to a JSON line by orjson and enqueued;
+# a listener thread does the only (blocking) write to stdout.
+#
+# With --workers, uvicorn spawns each worker, which runs this file as
+# __mp_main__ and then imports it again by name for the app factory. Only
+# the first copy in a process sets the pipeline up; the second finds its
+# QueueHandler on the root logger and leaves it alone.
+_root = logging.getLogger()
+_PIPELINE_OWNER = not any(
+    isinstance(h, logging.handlers.QueueHandler) for h in _root.handlers
 )
-logger = logging.getLogger("calculator_mcp")
+_listener_stopped = False
+
+def _stop_logging() -> None:
+    """Drain queued records and flush stdout; safe to call more than once."""
+    global _listener_stopped
+    if not _PIPELINE_OWNER:
+        return
+    if not _listener_stopped:
+        _listener_stopped = True
+        _log_listener.stop()
+    _stream_handler.flush()
+
+if _PIPELINE_OWNER:
+    _log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(_log_queue)
+    _queue_handler.setFormatter(structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=_SHARED_PROCESSORS,
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps),
+        ],
+    ))
+    _stream_handler = logging.StreamHandler(sys.stdout)
+    _stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    _root.addHandler(_queue_handler)
+    _root.setLevel(LOG_LEVEL_NO)
+    _log_listener = logging.handlers.QueueListener(
+        _log_queue, _stream_handler, respect_handler_level=True
+    )
+    _log_listener.start()
+    atexit.register(_stop_logging)
+
+    # structlog front end: calls below the configured level are no-ops
+    # (filtering bound logger); the rest are handed to stdlib for the queue.
+    structlog.configure(
+        processors=_SHARED_PROCESSORS + [
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(LOG_LEVEL_NO),
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
+
+logger = structlog.get_logger("calculator_mcp")
 
 # -----------------------------
 # Helpers
 # -----------------------------
+_LIMIT = 10**18
+
 def _validate_add_args(a: int, b: int) -> None:
-    LIMIT = 10**18
-    if not isinstance(a, int) or not isinstance(b, int):
-        raise TypeError("Both 'a' and 'b' must be integers.")
-    if abs(a) > LIMIT or abs(b) > LIMIT:
-        raise ValueError(f"Input out of bounds. |a|, |b| must be ≤ {LIMIT}.")
-
-def _time_call() -> Tuple[float, callable]:
-    start = time.perf_counter()
-    def done() -> float:
-        return time.perf_counter() - start
-    return start, done
+    # Types are enforced by pydantic (MCP) / FastAPI query coercion (HTTP).
+    if -_LIMIT <= a <= _LIMIT and -_LIMIT <= b <= _LIMIT:
+        return
+    raise ValueError(f"Input out of bounds. |a|, |b| must be ≤ {_LIMIT}.")
+
+# Level is fixed at startup; resolve once. add() skips timing when INFO is off.
+_DEBUG_ON = LOG_LEVEL_NO <= logging.DEBUG
+_INFO_ON = LOG_LEVEL_NO <= logging.INFO
+
+def _elapsed(t0: Optional[float]) -> Optional[float]:
+    return None if t0 is None else time.perf_counter() - t0
+
+def _log_exception(event: str, e: BaseException, **kw) -> None:
+    """Log an unexpected error; the full traceback is only formatted under DEBUG."""
+    if _DEBUG_ON:
+        kw["traceback"] = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+    else:
+        kw["error"] = repr(e)
+    logger.error(event, **kw)
+
+def _log_unexpected_errors(event: str, message: str):
+    """Log non-ValueError failures as `event` and re-raise as RuntimeError(message)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except ValueError:
+                raise
+            except Exception as e:
+                _log_exception(event, e)
+                raise RuntimeError(message) from e
+        return wrapper
+    return decorator
+
+# Correlation IDs: random per-process prefix (drawn once) + hex counter, so
+# IDs stay unique across --workers processes and restarts.
+_CID_PREFIX = uuid.uuid4().hex[:8]
+_CID = count()
 
 # -----------------------------
 # MCP server (stdio)
@@ -64,48 +176,39 @@ mcp = FastMCP(name="Calculator_Server")
     title="Add two numbers",
     description="Adds two integer numbers together and returns the result."
 )
+@_log_unexpected_errors("add_error", "An unexpected error occurred while adding the numbers.")
 def add(
-    a: int = Field(description="The first number to add"),
-    b: int = Field(description="The second number to add"),
+    a: int = A_FIELD,
+    b: int = B_FIELD,
 ) -> int:
-    call_id = str(uuid.uuid4())
-    logger.debug(f"[{call_id}] add() invoked with a={a}, b={b}")
-    _, done = _time_call()
+    call_id = f"{_CID_PREFIX}-{next(_CID):x}"
+    if _DEBUG_ON:
+        logger.debug("add_invoked", call_id=call_id, a=a, b=b)
+    t0 = time.perf_counter() if _INFO_ON else None
     try:
         _validate_add_args(a, b)
-        result = a + b
-        duration = done()
-        logger.info(f"[{call_id}] add() success result={result} in {duration:.6f}s")
-        return result
-    except (TypeError, ValueError) as e:
-        duration = done()
-        logger.warning(f"[{call_id}] add() validation error after {duration:.6f}s: {e}")
+    except ValueError as e:
+        logger.warning("add_invalid", call_id=call_id, duration_s=_elapsed(t0), error=str(e))
         raise ValueError(f"Invalid input: {e}") from e
-    except ValidationError as e:
-        duration = done()
-        logger.warning(f"[{call_id}] add() pydantic validation error after {duration:.6f}s: {e}")
-        raise ValueError(f"Validation failed: {e}") from e
-    except Exception as e:
-        duration = done()
-        tb = "".join(traceback.format_exception(type(e), e, e.__traceback__))
-        logger.error(f"[{call_id}] add() unexpected error after {duration:.6f}s:\n{tb}")
-        raise RuntimeError("An unexpected error occurred while adding the numbers.") from e
+    result = a + b
+    if _INFO_ON:
+        logger.info("add_ok", call_id=call_id, result=result, duration_s=time.perf_counter() - t0)
+    return result
 
 def _install_signal_handlers():
     def _handler(signum, _frame):
         name = signal.Signals(signum).name
-        logger.info(f"Received {name}. Shutting down gracefully…")
-        for h in logger.handlers:
-            try:
-                h.flush()
-            except Exception:
-                pass
+        logger.info("shutdown", signal=name)
+        try:
+            _stop_logging()
+        except Exception:
+            pass
         sys.exit(0)
     try:
         signal.signal(signal.SIGINT, _handler)
         signal.signal(signal.SIGTERM, _handler)
     except Exception as e:
-        logger.debug(f"Signal handlers not installed: {e}")
+        logger.debug("signal_handlers_not_installed", error=str(e))
 
 # -----------------------------
 # HTTP app (optional mode)
@@ -115,38 +218,51 @@ def build_http_app():
     Builds a small FastAPI app that exposes the same 'add' capability plus health.
     Only imported if --mode http to avoid optional deps when running stdio.
     """
-    from fastapi import FastAPI, Query
+    from fastapi import FastAPI, Query, Response
     from fastapi.responses import JSONResponse
 
+    # Endpoints are pure CPU, so they're async (no threadpool hop). The
+    # success body has a return type, so FastAPI serializes it straight to
+    # JSON bytes via pydantic-core.
     app = FastAPI(title="Calculator_Server HTTP")
 
+    # Hit often by load balancers: serve pre-encoded bytes, no per-call encoding.
+    health_body = orjson.dumps({"status": "ok", "service": "Calculator_Server"})
+
     @app.get("/health")
-    def health():
-        return {"status": "ok", "service": "Calculator_Server"}
+    async def health():
+        return Response(content=health_body, media_type="application/json")
+
+    a_query = Query(..., description=A_DESCRIPTION)
+    b_query = Query(..., description=B_DESCRIPTION)
 
     @app.get("/api/add")
-    def add_http(
-        a: int = Query(..., description="The first number"),
-        b: int = Query(..., description="The second number"),
-    ):
-        call_id = str(uuid.uuid4())
-        logger.debug(f"[{call_id}] /api/add a={a}, b={b}")
-        _, done = _time_call()
+    async def add_http(
+        a: int = a_query,
+        b: int = b_query,
+    ) -> AddHttpResult:
+        call_id = f"{_CID_PREFIX}-{next(_CID):x}"
+        if _DEBUG_ON:
+            logger.debug("add_http_invoked", call_id=call_id, a=a, b=b)
+        # Always timed: duration_s is part of the response body.
+        t0 = time.perf_counter()
         try:
             _validate_add_args(a, b)
             result = a + b
-            duration = done()
-            logger.info(f"[{call_id}] /api/add success result={result} in {duration:.6f}s")
-            return {"result": result, "call_id": call_id, "duration_s": duration}
-        except (TypeError, ValueError) as e:
-            duration = done()
-            logger.warning(f"[{call_id}] /api/add validation error after {duration:.6f}s: {e}")
+        except ValueError as e:
+            duration = time.perf_counter() - t0
+            logger.warning("add_http_invalid", call_id=call_id, duration_s=duration, error=str(e))
             return JSONResponse(status_code=400, content={"error": str(e), "call_id": call_id})
         except Exception as e:
-            duration = done()
-            tb = "".join(traceback.format_exception(type(e), e, e.__traceback__))
-            logger.error(f"[{call_id}] /api/add unexpected error after {duration:.6f}s:\n{tb}")
+            # Zero-cost on the happy path (3.11+); handled here so Starlette's
+            # ServerErrorMiddleware doesn't re-raise and log it a second time.
+            _log_exception("add_http_error", e, call_id=call_id,
+                           duration_s=time.perf_counter() - t0)
             return JSONResponse(status_code=500, content={"error": "internal error", "call_id": call_id})
+        duration = time.perf_counter() - t0
+        if _INFO_ON:
+            logger.info("add_http_ok", call_id=call_id, result=result, duration_s=duration)
+        return AddHttpResult(result=result, call_id=call_id, duration_s=duration)
 
     return app
 
@@ -159,30 +275,59 @@ def parse_args():
                    help="Run as MCP over stdio (default) or expose as an HTTP server.")
     p.add_argument("--host", default="127.0.0.1", help="HTTP host (when --mode http).")
     p.add_argument("--port", type=int, default=8000, help="HTTP port (when --mode http).")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Uvicorn worker processes (when --mode http).")
     return p.parse_args()
 
 if __name__ == "__main__":
     args = parse_args()
-    logger.info(f"Starting Calculator_Server in mode={args.mode}")
-    logger.debug(f"Effective LOG_LEVEL={logging.getLevelName(logger.level)}")
-    _install_signal_handlers()
+    logger.info("startup", service="Calculator_Server", mode=args.mode)
+    logger.debug("log_level", level=logging.getLevelName(LOG_LEVEL_NO))
 
     if args.mode == "stdio":
         # Pure MCP over stdio (for editors/agents)
+        _install_signal_handlers()
         try:
             mcp.run(transport="stdio")
         except Exception as e:
             tb = "".join(traceback.format_exception(type(e), e, e.__traceback__))
-            logger.critical(f"Fatal MCP stdio error:\n{tb}")
+            logger.critical("fatal_stdio_error", traceback=tb)
             sys.exit(1)
 
     elif args.mode == "http":
         # Simple HTTP wrapper using FastAPI + Uvicorn
         try:
-            app = build_http_app()
             import uvicorn
-            uvicorn.run(app, host=args.host, port=args.port, log_level=LOG_LEVEL.lower())
+            # uvloop (Cython event loop) + httptools (C HTTP parser); uvloop has
+            # no Windows build, so fall back to asyncio there. Access log is off
+            # because add_http already logs every call. log_config=None keeps
+            # uvicorn from installing its own stderr handlers, so its loggers
+            # propagate to the root QueueHandler like everything else.
+            uvicorn_opts = dict(
+                host=args.host,
+                port=args.port,
+                loop="asyncio" if sys.platform == "win32" else "uvloop",
+                http="httptools",
+                log_config=None,
+                log_level=LOG_LEVEL.lower(),
+                access_log=False,
+            )
+            if args.workers > 1:
+                # add_http is GIL-bound, so scale across processes. Workers
+                # import the app factory by name; the uvicorn supervisor owns
+                # signal handling in this mode.
+                uvicorn.run(
+                    "my_mcp_server_dualmode:build_http_app",
+                    factory=True,
+                    workers=args.workers,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)),
+                    **uvicorn_opts,
+                )
+            else:
+                # uvicorn's own SIGINT/SIGTERM handling drains in-flight
+                # requests on the first signal and force-quits on the second.
+                uvicorn.run(build_http_app(), **uvicorn_opts)
         except Exception as e:
             tb = "".join(traceback.format_exception(type(e), e, e.__traceback__))
-            logger.critical(f"Fatal HTTP error:\n{tb}")
+            logger.critical("fatal_http_error", traceback=tb)
             sys.exit(1)
@@ -1,123 +1,177 @@
 # server.py — MCP-style adapter (validation, guardrails, and upstream calls)
 # Run with: uvicorn server:app --port 8788 --reload
 
-import os, asyncio
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field, constr
+import os, asyncio, json, math, random
+from contextlib import asynccontextmanager
+from typing import Annotated, List, Optional
+from fastapi import FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel, Field, StringConstraints
 import httpx
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
-app = FastAPI(title="Statista MCP Demo")
 
 BASE_URL = os.getenv("BASE_URL", "https://api.example.com")
 API_KEY = os.getenv("STATISTA_API_KEY", "")
 MAX_PER_PAGE = int(os.getenv("MAX_PER_PAGE", "100"))
-PROJECTION_ALLOW = set((os.getenv("PROJECTION_ALLOWLIST",
-                                  "id,name,domain,industry,employees,country,updated_at")).split(","))
-
-def headers():
-    h = {}
-    if API_KEY:
-        h["Authorization"] = f"Bearer {API_KEY}"
-    return h
+MAX_ATTEMPTS = 4
+MAX_BACKOFF_S = 8.0  # cap for both computed delays and server Retry-After
+_MAX_PP = min(100, MAX_PER_PAGE)  # SearchCompaniesReq.per_page is already le=100
+PROJECTION_ALLOW = frozenset((os.getenv("PROJECTION_ALLOWLIST",
+                                        "id,name,domain,industry,employees,country,updated_at")).split(","))
+
+# Auth header is fixed for the process; build it once.
+_HEADERS = {"Authorization": f"Bearer {API_KEY}"} if API_KEY else {}
+
+# One pooled upstream client for the app's lifetime (keep-alive + HTTP/2),
+# instead of a new TCP/TLS connection per tool call.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.client = httpx.AsyncClient(
+        http2=True,
+        timeout=20,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=100),
+        headers=_HEADERS,
+    )
+    try:
+        yield
+    finally:
+        await app.state.client.aclose()
+
+app = FastAPI(title="Statista MCP Demo", lifespan=lifespan)
 
 # --------- Schemas (tool parameters) ---------
+# Pydantic v2 constraint types, defined once and shared between models; the
+# pattern is compiled by pydantic-core when each model's schema is built.
+_ID_PATTERN = r"^[A-Za-z0-9_-]{6,}$"
+CompanyId = Annotated[str, StringConstraints(pattern=_ID_PATTERN)]
+CountryCode = Annotated[str, StringConstraints(min_length=2, max_length=2)]
+
 class UsageLimitsReq(BaseModel):
     pass
 
 class SearchCompaniesReq(BaseModel):
     domain: Optional[str] = None
-    country: Optional[constr(min_length=2, max_length=2)] = None
+    country: Optional[CountryCode] = None
     industry: Optional[str] = None
     employees_min: Optional[int] = Field(default=None, ge=1)
     sort: Optional[str] = Field(default=None, pattern=r"^-?updated_at$")
     page: int = Field(default=1, ge=1)
     per_page: int = Field(default=25, ge=1, le=100)
-    fields: Optional[List[str]] = Field(default=None, max_items=30)
+    fields: Optional[List[str]] = Field(default=None, max_length=30)
 
 class GetCompanyReq(BaseModel):
-    company_id: constr(regex=r"^[A-Za-z0-9_-]{6,}$")
-    fields: Optional[List[str]] = Field(default=None, max_items=30)
+    company_id: CompanyId
+    fields: Optional[List[str]] = Field(default=None, max_length=30)
 
 class BulkEnrichReq(BaseModel):
-    domains: List[str] = Field(min_items=1, max_items=1000)
-    fields: Optional[List[str]] = Field(default=None, max_items=30)
+    domains: List[str] = Field(min_length=1, max_length=1000)
+    fields: Optional[List[str]] = Field(default=None, max_length=30)
 
 class DeltaReq(BaseModel):
-    company_id: constr(regex=r"^[A-Za-z0-9_-]{6,}$")
-    since: constr(min_length=10)
+    company_id: CompanyId
+    since: Annotated[str, StringConstraints(min_length=10)]
 
 # --------- Helpers ---------
 async def backoff_request(client, method: str, url: str, **kwargs):
-    delay = 0.5
-    for _ in range(3):
+    # Auth comes from the client's default headers; httpx merges any
+    # per-request extras (e.g. bulk_enrich's Content-Type) on top.
+    # Retries 429/5xx up to MAX_ATTEMPTS total; honours Retry-After (seconds,
+    # clamped to MAX_BACKOFF_S; non-finite values are ignored), otherwise
+    # capped exponential backoff with jitter so concurrent callers don't
+    # retry in lockstep. The last response is returned as-is.
+    for attempt in range(MAX_ATTEMPTS):
         resp = await client.request(method, url, **kwargs)
         if resp.status_code != 429 and resp.status_code < 500:
             return resp
-        retry_after = float(resp.headers.get("retry-after", delay))
-        await asyncio.sleep(retry_after)
-        delay *= 2
-    return await client.request(method, url, **kwargs)
+        if attempt == MAX_ATTEMPTS - 1:
+            break
+        try:
+            retry_after = float(resp.headers["retry-after"])
+        except (KeyError, ValueError):
+            retry_after = math.nan
+        if math.isfinite(retry_after):
+            delay = min(max(retry_after, 0.0), MAX_BACKOFF_S)
+        else:
+            delay = min(MAX_BACKOFF_S, 0.5 * (2 ** attempt)) * (0.5 + random.random())
+        await asyncio.sleep(delay)
+    return resp
 
 def sanitize_fields(fields: Optional[List[str]]):
     if not fields:
         return None
+    # Common case: every requested field is allowed → return it untouched.
+    if PROJECTION_ALLOW.issuperset(fields):
+        return fields
     return [f for f in fields if f in PROJECTION_ALLOW]
 
+def _ok(data, source) -> Response:
+    # Encode the tool envelope with orjson directly, skipping FastAPI's
+    # jsonable_encoder + stdlib json pass. orjson can't encode integers wider
+    # than 64 bits, so those (rare) payloads fall back to the stdlib encoder.
+    envelope = {"data": data, "source": source}
+    try:
+        body = orjson.dumps(envelope)
+    except TypeError:
+        body = json.dumps(envelope, separators=(",", ":")).encode()
+    return Response(body, media_type="application/json")
+
 # --------- Tools (endpoints) ---------
+_HEALTH_BYTES = orjson.dumps({"status": "ok", "service": "Statista MCP Demo"})
+
+@app.get("/health")
+async def health():
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
+
 @app.post("/tools/getUsageLimits")
-async def get_usage_limits(_: UsageLimitsReq):
-    async with httpx.AsyncClient(headers=headers(), timeout=20) as client:
-        r = await backoff_request(client, "GET", f"{BASE_URL}/me/limits")
-        try:
-            data = r.json()
-        except Exception:
-            raise HTTPException(status_code=502, detail="Invalid upstream response")
-        return {"data": data, "source": {"endpoint": "/me/limits", "status": r.status_code}}
+async def get_usage_limits(_: UsageLimitsReq, request: Request):
+    r = await backoff_request(request.app.state.client, "GET", f"{BASE_URL}/me/limits")
+    try:
+        data = r.json()
+    except Exception:
+        raise HTTPException(status_code=502, detail="Invalid upstream response")
+    return _ok(data, {"endpoint": "/me/limits", "status": r.status_code})
 
 @app.post("/tools/searchCompanies")
-async def search_companies(req: SearchCompaniesReq):
-    params = req.dict(exclude_none=True)
+async def search_companies(req: SearchCompaniesReq, request: Request):
+    params = req.model_dump(exclude_none=True)
     if "fields" in params:
         proj = sanitize_fields(params["fields"])
         if proj:
             params["fields"] = ",".join(proj)
         else:
             params.pop("fields", None)
-    params["per_page"] = min(params.get("per_page", 25), MAX_PER_PAGE)
-    async with httpx.AsyncClient(headers=headers(), timeout=20) as client:
-        r = await backoff_request(client, "GET", f"{BASE_URL}/companies", params=params)
-        data = r.json()
-        return {"data": data, "source": {"endpoint": "/companies", "params": params}}
+    if params["per_page"] > _MAX_PP:
+        params["per_page"] = _MAX_PP
+    r = await backoff_request(request.app.state.client, "GET", f"{BASE_URL}/companies", params=params)
+    data = r.json()
+    return _ok(data, {"endpoint": "/companies", "params": params})
 
 @app.post("/tools/getCompanyById")
-async def get_company(req: GetCompanyReq):
+async def get_company(req: GetCompanyReq, request: Request):
     params = {}
     proj = sanitize_fields(req.fields)
     if proj:
         params["fields"] = ",".join(proj)
-    async with httpx.AsyncClient(headers=headers(), timeout=20) as client:
-        r = await backoff_request(client, "GET", f"{BASE_URL}/companies/{req.company_id}", params=params)
-        data = r.json()
-        return {"data": data, "source": {"endpoint": f"/companies/{req.company_id}", "params": params}}
+    r = await backoff_request(request.app.state.client, "GET", f"{BASE_URL}/companies/{req.company_id}", params=params)
+    data = r.json()
+    return _ok(data, {"endpoint": f"/companies/{req.company_id}", "params": params})
 
 @app.post("/tools/bulkEnrich")
-async def bulk_enrich(req: BulkEnrichReq):
+async def bulk_enrich(req: BulkEnrichReq, request: Request):
     body = {"domains": req.domains}
     proj = sanitize_fields(req.fields)
     if proj:
         body["fields"] = proj
-    async with httpx.AsyncClient(headers={**headers(), "Content-Type": "application/json"}, timeout=60) as client:
-        r = await backoff_request(client, "POST", f"{BASE_URL}/companies/bulk", json=body)
-        data = r.json()
-        return {"data": data, "source": {"endpoint": "/companies/bulk"}}
+    r = await backoff_request(request.app.state.client, "POST", f"{BASE_URL}/companies/bulk", json=body,
+                              headers={"Content-Type": "application/json"}, timeout=60)
+    data = r.json()
+    return _ok(data, {"endpoint": "/companies/bulk"})
 
 @app.post("/tools/getDeltaUpdates")
-async def delta(req: DeltaReq):
+async def delta(req: DeltaReq, request: Request):
     params = {"since": req.since}
-    async with httpx.AsyncClient(headers=headers(), timeout=20) as client:
-        r = await backoff_request(client, "GET", f"{BASE_URL}/companies/{req.company_id}/updates", params=params)
-        data = r.json()
-        return {"data": data, "source": {"endpoint": f"/companies/{req.company_id}/updates", "params": params}}
+    r = await backoff_request(request.app.state.client, "GET", f"{BASE_URL}/companies/{req.company_id}/updates", params=params)
+    data = r.json()
+    return _ok(data, {"endpoint": f"/companies/{req.company_id}/updates", "params": params})
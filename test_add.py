@@ -1,8 +1,10 @@
 import asyncio
 import logging
 import argparse
-from typing import Any
+import time
+from typing import Any, Optional
 from fastmcp import Client
+from fastmcp.client.client import CallToolResult
 
 # --- Logging setup -----------------------------------------------------------
 logging.basicConfig(
@@ -12,23 +14,22 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 
 
-async def call_add(url: str, a: int, b: int, timeout_s: float = 10.0) -> Any:
+async def call_add(client: Client, a: int, b: int, timeout_s: float = 10.0) -> Any:
     """
-    Connect to the MCP server at `url` and call the 'add' tool with {'a': a, 'b': b}.
+    Call the 'add' tool with {'a': a, 'b': b} on an already-connected `client`.
     Returns the raw result (often a CallToolResult).
-    """
-    log.debug("Preparing Client with URL: %s", url)
-    client = Client(url)
 
+    The caller owns the session (`async with Client(url) as client:`), so many
+    calls can share one connection/handshake.
+    """
+    log.debug("Calling tool 'add' with a=%s, b=%s", a, b)
     try:
-        async with client:
-            log.debug("Client connected. Calling tool 'add' with a=%s, b=%s", a, b)
-            result = await asyncio.wait_for(
-                client.call_tool("add", {"a": a, "b": b}),
-                timeout=timeout_s,
-            )
-            log.debug("Raw result received from server: %r", result)
-            return result
+        result = await asyncio.wait_for(
+            client.call_tool("add", {"a": a, "b": b}),
+            timeout=timeout_s,
+        )
+        log.debug("Raw result received from server: %r", result)
+        return result
 
     except asyncio.TimeoutError:
         log.error("Timed out after %.1f seconds waiting for tool response.", timeout_s)
@@ -38,6 +39,39 @@ async def call_add(url: str, a: int, b: int, timeout_s: float = 10.0) -> Any:
         raise
 
 
+def _sum_from_tool_fields(data: Any, structured_content: Any, content: Any) -> Optional[int]:
+    """
+    Try the fields of a tool-call result in order: .data, then
+    structured_content['result'], then the first text content item.
+    Returns None if none of them holds an integer.
+    """
+    if data is not None:
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            pass
+
+    if isinstance(structured_content, dict) and "result" in structured_content:
+        try:
+            return int(structured_content["result"])
+        except (TypeError, ValueError):
+            pass
+
+    # Optional fallback: first text item, if present
+    try:
+        if content and isinstance(content[0], dict):
+            # some clients use dicts
+            txt = content[0].get("text")
+        else:
+            # fastmcp.TextContent object with .text
+            txt = getattr(content[0], "text", None) if content else None
+        if isinstance(txt, str):
+            return int(txt.strip())
+    except Exception:
+        pass
+    return None
+
+
 def coerce_sum_from_result(result: Any) -> int:
     """
     Extract an integer sum from common FastMCP return shapes:
@@ -47,49 +81,31 @@ def coerce_sum_from_result(result: Any) -> int:
         .structured_content == {'result': 46}
         .content[0].text == "46" (optional)
     - plain int/float
-    - dict with keys like 'result' / 'sum' / 'total'
     - numeric string
+    - dict with keys like 'result' / 'sum' / 'total'
+    - other result objects (e.g. mcp.types.CallToolResult), duck-typed
     """
     log.debug("Coercing sum from result: %r", result)
 
-    # 1) FastMCP CallToolResult object
-    #    We avoid importing its class; just duck-type by attributes.
-    if hasattr(result, "data"):
-        val = getattr(result, "data")
-        try:
-            return int(val)
-        except (TypeError, ValueError):
-            pass
+    # 1) FastMCP CallToolResult (the common case): read its fields directly.
+    if isinstance(result, CallToolResult):
+        val = _sum_from_tool_fields(result.data, result.structured_content, result.content)
+        if val is not None:
+            return val
 
-    if hasattr(result, "structured_content"):
-        sc = getattr(result, "structured_content") or {}
-        if isinstance(sc, dict) and "result" in sc:
-            try:
-                return int(sc["result"])
-            except (TypeError, ValueError):
-                pass
+    # 2) Primitive numeric
+    elif isinstance(result, (int, float)):
+        return int(result)
 
-    if hasattr(result, "content"):
-        # Optional fallback: first text item, if present
+    # 3) Numeric string
+    elif isinstance(result, str):
         try:
-            content = getattr(result, "content") or []
-            if content and isinstance(content[0], dict):
-                # some clients use dicts
-                txt = content[0].get("text")
-            else:
-                # fastmcp.TextContent object with .text
-                txt = getattr(content[0], "text", None) if content else None
-            if isinstance(txt, str):
-                return int(txt.strip())
-        except Exception:
+            return int(result.strip())
+        except ValueError:
             pass
 
-    # 2) Primitive numeric
-    if isinstance(result, (int, float)):
-        return int(result)
-
-    # 3) Dict shapes
-    if isinstance(result, dict):
+    # 4) Dict shapes
+    elif isinstance(result, dict):
         for key in ("result", "sum", "total", "value"):
             if key in result:
                 try:
@@ -97,12 +113,15 @@ def coerce_sum_from_result(result: Any) -> int:
                 except (TypeError, ValueError):
                     continue
 
-    # 4) Numeric string
-    if isinstance(result, str):
-        try:
-            return int(result.strip())
-        except ValueError:
-            pass
+    # 5) Any other result object: duck-type by attributes.
+    else:
+        val = _sum_from_tool_fields(
+            getattr(result, "data", None),
+            getattr(result, "structured_content", None),
+            getattr(result, "content", None),
+        )
+        if val is not None:
+            return val
 
     raise ValueError(
         "Could not determine numeric sum from server response. "
@@ -110,16 +129,27 @@ def coerce_sum_from_result(result: Any) -> int:
     )
 
 
-async def main_async(url: str, a: int, b: int, timeout_s: float) -> None:
-    log.info("Calling MCP 'add' tool at %s with a=%d, b=%d", url, a, b)
-    result = await call_add(url, a, b, timeout_s=timeout_s)
+async def main_async(url: str, a: int, b: int, timeout_s: float, repeat: int = 1) -> None:
+    log.info("Calling MCP 'add' tool at %s with a=%d, b=%d (x%d)", url, a, b, repeat)
+    log.debug("Preparing Client with URL: %s", url)
+
+    # One session for all calls: connect/initialize once, then pipeline.
+    async with Client(url) as client:
+        log.debug("Client connected.")
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(call_add(client, a, b, timeout_s=timeout_s) for _ in range(repeat))
+        )
+        elapsed = time.perf_counter() - start
 
+    if repeat > 1:
+        log.info("Completed %d calls in %.3fs (%.1f calls/s)", repeat, elapsed, repeat / elapsed)
 
     # Print the server’s wrapped result directly (uses CallToolResult.data if present)
-    print(getattr(result, "data", result))
+    print(getattr(results[0], "data", results[0]))
 
     # (Optional) quick sanity check:
-    # assert getattr(result, "data", None) == a + b, "Server sum mismatch"
+    # assert getattr(results[0], "data", None) == a + b, "Server sum mismatch"
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -133,6 +163,12 @@ def build_arg_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument("--a", type=int, default=145, help="First addend (default: %(default)s)")
     parser.add_argument("--b", type=int, default=87, help="Second addend (default: %(default)s)")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Number of 'add' calls to make over one client session (default: %(default)s)",
+    )
     parser.add_argument(
         "--timeout",
         type=float,
@@ -143,20 +179,28 @@ def build_arg_parser() -> argparse.ArgumentParser:
 
 
 def run_entry() -> None:
-    args = build_arg_parser().parse_args()
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
 
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # Spyder/Jupyter etc.
-            log.debug("Detected running event loop; scheduling task via create_task().")
-            loop.create_task(main_async(args.url, args.a, args.b, args.timeout))
-        else:
-            log.debug("No running event loop; using loop.run_until_complete().")
-            loop.run_until_complete(main_async(args.url, args.a, args.b, args.timeout))
+        asyncio.get_running_loop()
     except RuntimeError:
-        log.debug("No current event loop; using asyncio.run().")
-        asyncio.run(main_async(args.url, args.a, args.b, args.timeout))
+        # Normal CLI run: no loop yet. Prefer uvloop where it's available
+        # (it has no Windows build), then let asyncio.run() own the loop.
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
+        asyncio.run(main_async(args.url, args.a, args.b, args.timeout, args.repeat))
+    else:
+        # Spyder/Jupyter etc. already run a loop; asyncio.run() can't nest.
+        log.debug("Detected running event loop; re-entering it via nest_asyncio.")
+        import nest_asyncio
+        nest_asyncio.apply()
+        asyncio.run(main_async(args.url, args.a, args.b, args.timeout, args.repeat))
 
 
 if __name__ == "__main__":